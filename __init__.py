@@ -32,8 +32,13 @@ from bpy.props import IntProperty, BoolProperty, StringProperty, CollectionPrope
 
 # Import modules
 from .main.rv_ui import register as ui_register, unregister as ui_unregister
+from .main.rv_cache import register as cache_register, unregister as cache_unregister, tag_display_update
+from .main.rv_stats import unregister as stats_unregister
 from .main.rv_ops import *
 from .main.rv_group_navigation import *
+from .main.rv_transfer import *
+from .main.rv_io import *
+from .main.rv_seed import *
 
 class RETOPOVIEW_group(PropertyGroup):
     def ensure_unique_name(self, context):
@@ -58,7 +63,7 @@ class RETOPOVIEW_group(PropertyGroup):
             self.name = self.name + "_1"
 
     name: StringProperty(default='Group')
-    color: FloatVectorProperty(name="Group Color", subtype='COLOR', default=[1.0, 1.0, 1.0], min=0.0, max=1.0)
+    color: FloatVectorProperty(name="Group Color", subtype='COLOR', default=[1.0, 1.0, 1.0], min=0.0, max=1.0, update=tag_display_update)
     group_id: IntProperty(default=1)
 
     # Workaround to handle unique name enforcement
@@ -79,6 +84,10 @@ def register():
         RETOPOVIEW_OT_change_selection_group_id,
         RETOPOVIEW_OT_toggle_mode,
         RETOPOVIEW_OT_remove_group,
+        RETOPOVIEW_OT_transfer_groups,
+        RETOPOVIEW_OT_export_groups,
+        RETOPOVIEW_OT_import_groups,
+        RETOPOVIEW_OT_seed_groups,
     )
 
     for c in classes:
@@ -86,22 +95,24 @@ def register():
             bpy.utils.unregister_class(c)
         bpy.utils.register_class(c)
 
-    bpy.types.Object.rv_enabled = BoolProperty()
-    bpy.types.Object.rv_backface_culling = BoolProperty()
-    bpy.types.Object.rv_use_x_mirror = BoolProperty()
-    bpy.types.Object.rv_show_wire = BoolProperty()
-    bpy.types.Object.rv_show_poles = BoolProperty()
+    # Display settings only, see tag_display_update
+    bpy.types.Object.rv_enabled = BoolProperty(update=tag_display_update)
+    bpy.types.Object.rv_backface_culling = BoolProperty(update=tag_display_update)
+    bpy.types.Object.rv_use_x_mirror = BoolProperty(update=tag_display_update)
+    bpy.types.Object.rv_show_wire = BoolProperty(update=tag_display_update)
+    bpy.types.Object.rv_show_poles = BoolProperty(update=tag_display_update)
 
-    bpy.types.Object.rv_index = IntProperty()
+    bpy.types.Object.rv_index = IntProperty(update=tag_display_update)
     bpy.types.Object.rv_group_idx_counter = IntProperty(default=1)
 
     bpy.types.Object.rv_groups = CollectionProperty(type=RETOPOVIEW_group)
 
-    bpy.types.Object.rv_groups_alpha = FloatProperty(default=1.0, max=1.0, min=0.0)
-    bpy.types.Object.rv_poles_size = FloatProperty(default=1.0, max=2.0, min=0.0)
+    bpy.types.Object.rv_groups_alpha = FloatProperty(default=1.0, max=1.0, min=0.0, update=tag_display_update)
+    bpy.types.Object.rv_poles_size = FloatProperty(default=1.0, max=2.0, min=0.0, update=tag_display_update)
 
-    bpy.types.Object.rv_poles_color = FloatVectorProperty(name="Poles Color", subtype='COLOR', default=[1.0, 1.0, 1.0], min=0.0, max=1.0)
+    bpy.types.Object.rv_poles_color = FloatVectorProperty(name="Poles Color", subtype='COLOR', default=[1.0, 1.0, 1.0], min=0.0, max=1.0, update=tag_display_update)
 
+    cache_register()  # Track geometry changes for cached data
     ui_register()  # Register UI components
 
 def unregister():
@@ -126,6 +137,10 @@ def unregister():
         RETOPOVIEW_OT_change_selection_group_id,
         RETOPOVIEW_OT_toggle_mode,
         RETOPOVIEW_OT_remove_group,
+        RETOPOVIEW_OT_transfer_groups,
+        RETOPOVIEW_OT_export_groups,
+        RETOPOVIEW_OT_import_groups,
+        RETOPOVIEW_OT_seed_groups,
     )
 
     for c in classes:
@@ -134,6 +149,8 @@ def unregister():
 
     bpy.utils.unregister_class(RETOPOVIEW_group)
     ui_unregister()  # Unregister UI components
+    stats_unregister()
+    cache_unregister()
 
 if __name__ == "__main__":
     register()
@@ -0,0 +1,273 @@
+# RetopoView
+# Copyright (C) 2021  Loki Bear
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import bpy
+from bpy.app.handlers import persistent
+
+# Every real geometry change of an object (mesh edits, attribute writes, modifier
+# changes) bumps its revision. Cached data is stored together with the revision it
+# was built from and is considered stale as soon as the object revision moves on.
+_revisions = {}
+_caches = {}
+_dirty_faces = {}
+_object_users = {}
+_modifier_states = {}
+_display_updates = set()
+_revision_counter = 0
+
+def object_key(obj):
+    return obj.original.as_pointer()
+
+def get_revision(obj):
+    return _revisions.get(object_key(obj), 0)
+
+def _bump_revision(key):
+    global _revision_counter
+    _revision_counter += 1
+    _revisions[key] = _revision_counter
+
+def tag_revision(obj):
+    # For code that writes geometry itself. Pending group edits never describe
+    # such a write, so they are dropped.
+    key = object_key(obj)
+    _bump_revision(key)
+    _dirty_faces.pop(key, None)
+
+def tag_display_update(self, context):
+    # Update callback for settings that never change geometry. Changing a custom
+    # property tags its object for a geometry update anyway, which must not
+    # invalidate the cached geometry. Also used by properties of nested groups.
+    _display_updates.add(self.id_data.original.as_pointer())
+
+# Modifiers whose result changes with the current frame on their own
+TIME_DEPENDENT_MODIFIERS = {
+    'BUILD', 'CLOTH', 'DYNAMIC_PAINT', 'EXPLODE', 'FLUID', 'MESH_CACHE',
+    'MESH_SEQUENCE_CACHE', 'NODES', 'OCEAN', 'PARTICLE_SYSTEM', 'SOFT_BODY', 'WAVE',
+}
+
+def get_modifier_state(obj):
+    # (signature, source objects) of the modifier stack. The signature holds every
+    # modifier setting, sources are the objects the modifiers read from.
+    signature = []
+    sources = []
+
+    for modifier in obj.modifiers:
+        signature.append(modifier.type)
+
+        for prop in modifier.bl_rna.properties:
+            if prop.identifier == 'rna_type' or prop.type == 'COLLECTION':
+                continue
+
+            value = getattr(modifier, prop.identifier)
+
+            if prop.type == 'POINTER':
+                if isinstance(value, bpy.types.Object):
+                    sources.append(value)
+
+                value = value.as_pointer() if value is not None else 0
+            elif getattr(prop, 'is_array', False):
+                value = tuple(value)
+
+            signature.append(value)
+
+    return tuple(signature), sources
+
+def get_cached(obj, name, allow_stale=False):
+    entry = _caches.get((object_key(obj), name))
+
+    if entry is None or (not allow_stale and entry[0] != get_revision(obj)):
+        return None
+
+    return entry[1]
+
+def is_cache_current(obj, name):
+    entry = _caches.get((object_key(obj), name))
+    return entry is not None and entry[0] == get_revision(obj)
+
+def get_cache_entry(obj, name):
+    # (revision, value) regardless of staleness, or None
+    return _caches.get((object_key(obj), name))
+
+def set_cached(obj, name, value, revision=None):
+    _caches[(object_key(obj), name)] = (get_revision(obj) if revision is None else revision, value)
+
+def clear_cached(key, *names):
+    # Takes an object_key, the object itself may already be freed at this point
+    for name in names:
+        _caches.pop((key, name), None)
+
+def retain_object(key):
+    # Every running overlay retains its object. Group edits are only recorded for
+    # retained objects, otherwise nothing would ever drain the records.
+    _object_users[key] = _object_users.get(key, 0) + 1
+
+def release_object(key, *names):
+    # The named caches are dropped together with the last reference
+    count = _object_users.pop(key, 0) - 1
+
+    if count > 0:
+        _object_users[key] = count
+        return
+
+    _dirty_faces.pop(key, None)
+    clear_cached(key, *names)
+
+def tag_dirty_faces(obj, face_indices, group_id, face_count):
+    # Records a group assignment so caches built right before it can be patched
+    # instead of rebuilt. A record is [base revision, post edit revision, face
+    # count, edits], the post edit revision is filled in by the geometry update the
+    # edit causes. Consumers may only patch a cache built on the base revision, and
+    # only while the object is still at the post edit revision. Face indices and
+    # the face count refer to the mesh being edited, before any modifier.
+    key = object_key(obj)
+
+    if key not in _object_users:
+        return
+
+    revision = get_revision(obj)
+    record = _dirty_faces.get(key)
+
+    # Edits following each other with no other change in between are merged
+    if record is None or (record[1] is not None and record[1] != revision) or record[2] != face_count:
+        record = [revision, None, face_count, []]
+
+    record[1] = None
+    record[3].append((face_indices, group_id))
+    _dirty_faces[key] = record
+
+def pop_dirty_faces(obj):
+    return _dirty_faces.pop(object_key(obj), None)
+
+@persistent
+def on_depsgraph_update(scene, depsgraph):
+    # The object geometry flag alone is not trusted, it is also raised by changes to
+    # any custom property. Only mesh (and shape key) updates, a changed modifier
+    # stack or an update of an object the modifiers read from count.
+    display_keys = set(_display_updates)
+    _display_updates.clear()
+
+    edited_meshes = set()
+    moved = set()
+
+    for update in depsgraph.updates:
+        if update.is_updated_geometry and isinstance(update.id, bpy.types.Mesh):
+            edited_meshes.add(update.id.original.as_pointer())
+        elif update.is_updated_geometry and isinstance(update.id, bpy.types.Key) and update.id.user is not None:
+            edited_meshes.add(update.id.user.original.as_pointer())
+
+        if update.is_updated_geometry or update.is_updated_transform:
+            moved.add(update.id.original.as_pointer())
+
+    for update in depsgraph.updates:
+        if not isinstance(update.id, bpy.types.Object) or update.id.type != 'MESH':
+            continue
+
+        obj = update.id.original
+        key = object_key(obj)
+
+        signature, sources = get_modifier_state(obj)
+        modifiers_changed = _modifier_states.get(key) != signature
+        _modifier_states[key] = signature
+
+        if key in display_keys and not modifiers_changed:
+            continue
+
+        source_moved = len(sources) > 0 and (update.is_updated_transform or any(source.as_pointer() in moved for source in sources))
+
+        if obj.data.as_pointer() not in edited_meshes and not modifiers_changed and not source_moved:
+            continue
+
+        _bump_revision(key)
+        record = _dirty_faces.get(key)
+
+        if record is None:
+            continue
+
+        if record[1] is None:
+            record[1] = _revisions[key]
+        else:
+            # Something else changed the geometry, the edits no longer describe it
+            del _dirty_faces[key]
+
+def has_animation(data):
+    return data is not None and data.animation_data is not None
+
+def has_animated_geometry(obj):
+    mesh = obj.data
+
+    if has_animation(mesh) or (mesh.shape_keys is not None and has_animation(mesh.shape_keys)):
+        return True
+
+    # Object animation can drive modifier settings
+    if len(obj.modifiers) > 0 and has_animation(obj):
+        return True
+
+    if any(modifier.type in TIME_DEPENDENT_MODIFIERS for modifier in obj.modifiers):
+        return True
+
+    # Armatures, hooks, shrinkwrap targets and the like that move on their own
+    for source in get_modifier_state(obj)[1]:
+        while source is not None:
+            if has_animation(source):
+                return True
+
+            source = source.parent
+
+    return False
+
+@persistent
+def on_frame_change(scene, *args):
+    # Frame changes do not run depsgraph_update_post, animated geometry would
+    # keep showing the overlay of the frame it was cached on
+    cached_keys = {key for key, _ in _caches}
+
+    for obj in scene.objects:
+        if obj.type == 'MESH' and object_key(obj) in cached_keys and has_animated_geometry(obj):
+            tag_revision(obj)
+
+@persistent
+def on_data_reload(*args):
+    # Loading a file or stepping through undo can swap the data behind an
+    # object pointer, never carry cached data over
+    _revisions.clear()
+    _caches.clear()
+    _dirty_faces.clear()
+    _modifier_states.clear()
+
+def register():
+    bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+    bpy.app.handlers.frame_change_post.append(on_frame_change)
+
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        handlers.append(on_data_reload)
+
+def unregister():
+    if on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+
+    if on_frame_change in bpy.app.handlers.frame_change_post:
+        bpy.app.handlers.frame_change_post.remove(on_frame_change)
+
+    for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+        if on_data_reload in handlers:
+            handlers.remove(on_data_reload)
+
+    _revisions.clear()
+    _caches.clear()
+    _dirty_faces.clear()
+    _object_users.clear()
+    _modifier_states.clear()
+    _display_updates.clear()
@@ -17,12 +17,14 @@
 import bpy
 import bmesh
 import random
+import numpy as np
 from bpy.props import StringProperty, FloatVectorProperty, BoolProperty, EnumProperty
 from bpy.types import Operator
 from mathutils import Color
 
 # Import utility functions from rv_utils.py
 from .rv_utils import set_up_marker_data_layer
+from .rv_cache import tag_revision, tag_dirty_faces
 
 class RETOPOVIEW_OT_add_group(Operator):
     bl_idname = "retopoview.add_group"
@@ -175,21 +177,27 @@ class RETOPOVIEW_OT_change_selection_group_id(Operator):
         retopoViewGroupLayer = bm.faces.layers.int["RetopoViewGroupLayer"]
 
         if obj.rv_use_x_mirror:
-            current_selection = set()
-            for face in bm.faces:
-                if face.select:
-                    current_selection.add(face)
-
+            current_selection = {face for face in bm.faces if face.select}
             bpy.ops.mesh.select_mirror(axis={'X'}, extend=True)
 
-        for face in bm.faces:
-            if face.select:
-                face[retopoViewGroupLayer] = group_id
+        # The only pass over every face, everything below only touches the selection
+        selected_faces = [face for face in bm.faces if face.select]
+        bm.faces.index_update()
 
-                if obj.rv_use_x_mirror and face not in current_selection:
+        for face in selected_faces:
+            face[retopoViewGroupLayer] = group_id
+
+        if obj.rv_use_x_mirror:
+            for face in selected_faces:
+                if face not in current_selection:
                     face.select = False
 
-        bmesh.update_edit_mesh(mesh)
+        # Lets the overlay patch the changed faces instead of rebuilding everything
+        changed_faces = np.fromiter((face.index for face in selected_faces), dtype=np.int64, count=len(selected_faces))
+        tag_dirty_faces(obj, changed_faces, group_id, len(bm.faces))
+
+        # Only an attribute changed, no need to recompute the tessellation
+        bmesh.update_edit_mesh(mesh, loop_triangles=False, destructive=False)
         mesh.update()
 
         if object_mode != "EDIT":
@@ -238,6 +246,9 @@ class RETOPOVIEW_OT_remove_group(Operator):
         bmesh.update_edit_mesh(mesh)
         mesh.update()
 
+        # The rv_index change below marks this update as display only
+        tag_revision(obj)
+
         bpy.ops.object.mode_set(mode=object_mode)
 
         obj.rv_groups.remove(remove_id)
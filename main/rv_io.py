@@ -0,0 +1,210 @@
+# RetopoView
+# Copyright (C) 2021  Loki Bear
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import bpy
+import mmap
+import struct
+import zlib
+import numpy as np
+from bpy.props import BoolProperty, StringProperty
+from bpy.types import Operator
+from bpy_extras.io_utils import ExportHelper, ImportHelper
+
+from .rv_utils import read_face_group_ids, write_face_group_ids, merge_group_definitions
+from .rv_cache import tag_revision
+
+# File layout, little endian:
+#   header   magic, version, face count, vertex count, topology fingerprint, group count
+#   groups   group id, rgb color, name length, utf-8 name (repeated group count times)
+#   payload  id dtype size, compressed size, zlib compressed face id array
+FILE_MAGIC = b'RVGA'
+FILE_VERSION = 2
+
+HEADER = struct.Struct('<4sHIIII')
+GROUP = struct.Struct('<i3fH')
+PAYLOAD = struct.Struct('<BQ')
+
+ID_DTYPES = {1: np.uint8, 2: np.uint16, 4: np.int32}
+
+def topology_fingerprint(mesh):
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_total', loop_totals)
+    mesh.loops.foreach_get('vertex_index', loop_verts)
+
+    return zlib.crc32(loop_verts, zlib.crc32(loop_totals))
+
+def encode_group_assignment(groups, group_ids, vert_count, fingerprint):
+    # groups: iterable of (group_id, name, color)
+    groups = list(groups)
+    group_ids = np.asarray(group_ids)
+
+    id_size = 4
+    if group_ids.size == 0 or (group_ids.min() >= 0 and group_ids.max() < 2 ** 16):
+        id_size = 1 if group_ids.size == 0 or group_ids.max() < 2 ** 8 else 2
+
+    payload = zlib.compress(np.ascontiguousarray(group_ids, dtype=ID_DTYPES[id_size]), 6)
+
+    chunks = [HEADER.pack(FILE_MAGIC, FILE_VERSION, len(group_ids), vert_count, fingerprint, len(groups))]
+
+    for group_id, name, color in groups:
+        encoded_name = name.encode('utf-8')
+        chunks.append(GROUP.pack(group_id, *color[:3], len(encoded_name)))
+        chunks.append(encoded_name)
+
+    chunks.append(PAYLOAD.pack(id_size, len(payload)))
+    chunks.append(payload)
+
+    return b''.join(chunks)
+
+def decode_group_assignment(buffer):
+    # Accepts any buffer, including an mmap, and only copies the decompressed ids
+    magic, version, face_count, vert_count, fingerprint, group_count = HEADER.unpack_from(buffer, 0)
+
+    if magic != FILE_MAGIC:
+        raise ValueError("Not a RetopoView group file")
+
+    if version != FILE_VERSION:
+        raise ValueError(f"Unsupported RetopoView group file version {version}")
+
+    offset = HEADER.size
+    groups = []
+
+    for _ in range(group_count):
+        group_id, r, g, b, name_length = GROUP.unpack_from(buffer, offset)
+        offset += GROUP.size
+
+        name = bytes(buffer[offset:offset + name_length]).decode('utf-8')
+        offset += name_length
+
+        groups.append((group_id, name, (r, g, b)))
+
+    id_size, payload_size = PAYLOAD.unpack_from(buffer, offset)
+    offset += PAYLOAD.size
+
+    if id_size not in ID_DTYPES:
+        raise ValueError("Corrupted RetopoView group file")
+
+    payload = zlib.decompress(memoryview(buffer)[offset:offset + payload_size])
+    group_ids = np.frombuffer(payload, dtype=ID_DTYPES[id_size])
+
+    if len(group_ids) != face_count:
+        raise ValueError("Corrupted RetopoView group file")
+
+    return groups, group_ids, vert_count, fingerprint
+
+class RETOPOVIEW_OT_export_groups(Operator, ExportHelper):
+    bl_idname = "retopoview.export_groups"
+    bl_label = "Export Groups"
+    bl_description = "Export group definitions and face assignments to a file"
+
+    filename_ext = ".rvg"
+    filter_glob: StringProperty(default="*.rvg", options={'HIDDEN'})
+
+    @classmethod
+    def poll(cls, context):
+        return context.object is not None and context.object.type == 'MESH' and len(context.object.rv_groups) > 0
+
+    def execute(self, context):
+        obj = context.object
+
+        object_mode = obj.mode
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+        try:
+            mesh = obj.data
+            data = encode_group_assignment(
+                ((group.group_id, group.name, group.color) for group in obj.rv_groups),
+                read_face_group_ids(mesh),
+                len(mesh.vertices),
+                topology_fingerprint(mesh),
+            )
+        except struct.error as error:
+            self.report({'ERROR'}, str(error))
+            return {'CANCELLED'}
+        finally:
+            bpy.ops.object.mode_set(mode=object_mode)
+
+        try:
+            with open(self.filepath, 'wb') as file:
+                file.write(data)
+        except OSError as error:
+            self.report({'ERROR'}, str(error))
+            return {'CANCELLED'}
+
+        return {'FINISHED'}
+
+class RETOPOVIEW_OT_import_groups(Operator, ImportHelper):
+    bl_idname = "retopoview.import_groups"
+    bl_label = "Import Groups"
+    bl_description = "Import group definitions and face assignments from a file"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filename_ext = ".rvg"
+    filter_glob: StringProperty(default="*.rvg", options={'HIDDEN'})
+
+    merge: BoolProperty(name="Merge", description="Keep existing groups and remap colliding ids instead of replacing them")
+    ignore_topology: BoolProperty(name="Ignore Topology", description="Import even if the mesh topology changed, as long as the face count matches")
+
+    @classmethod
+    def poll(cls, context):
+        return context.object is not None and context.object.type == 'MESH'
+
+    def execute(self, context):
+        obj = context.object
+
+        try:
+            with open(self.filepath, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                groups, group_ids, vert_count, fingerprint = decode_group_assignment(buffer)
+        except (OSError, ValueError, struct.error, zlib.error) as error:
+            self.report({'ERROR'}, str(error))
+            return {'CANCELLED'}
+
+        object_mode = obj.mode
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+        try:
+            mesh = obj.data
+
+            if len(group_ids) != len(mesh.polygons):
+                self.report({'ERROR'}, f"Face count mismatch: file has {len(group_ids)}, mesh has {len(mesh.polygons)}")
+                return {'CANCELLED'}
+
+            if not self.ignore_topology and (vert_count != len(mesh.vertices) or fingerprint != topology_fingerprint(mesh)):
+                self.report({'ERROR'}, "Mesh topology does not match the exported mesh")
+                return {'CANCELLED'}
+
+            if not self.merge:
+                obj.rv_groups.clear()
+                obj.rv_group_idx_counter = 1
+
+            remap = merge_group_definitions(obj, groups)
+
+            group_ids = group_ids.astype(np.int32)
+            group_ids[(group_ids < 0) | (group_ids >= len(remap))] = 0
+            write_face_group_ids(mesh, remap[group_ids])
+            tag_revision(obj)
+        finally:
+            bpy.ops.object.mode_set(mode=object_mode)
+
+        obj.rv_index = min(obj.rv_index, max(len(obj.rv_groups) - 1, 0))
+
+        return {'FINISHED'}
+
+classes = (
+    RETOPOVIEW_OT_export_groups,
+    RETOPOVIEW_OT_import_groups,
+)
@@ -15,13 +15,36 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import bpy
-import bmesh
 import numpy as np
 import gpu
 from bpy.props import StringProperty, FloatVectorProperty, BoolProperty, EnumProperty, CollectionProperty, IntProperty
 from bpy.types import Operator, PropertyGroup
 from gpu_extras.batch import batch_for_shader
-from .rv_shaders import vertex_shader, fragment_shader
+from .rv_shaders import vertex_shader, fragment_shader, pole_vertex_shader, pole_fragment_shader
+from .rv_cache import object_key, get_revision, get_cached, get_cache_entry, set_cached, retain_object, release_object, pop_dirty_faces
+from .rv_utils import read_face_group_ids
+
+# Modifiers that move vertices around but keep every face, in order
+FACE_PRESERVING_MODIFIERS = {
+    'ARMATURE', 'CAST', 'CORRECTIVE_SMOOTH', 'CURVE', 'DATA_TRANSFER', 'DISPLACE',
+    'HOOK', 'LAPLACIANDEFORM', 'LAPLACIANSMOOTH', 'LATTICE', 'MESH_CACHE',
+    'MESH_DEFORM', 'NORMAL_EDIT', 'SHRINKWRAP', 'SIMPLE_DEFORM', 'SMOOTH',
+    'SURFACE_DEFORM', 'UV_PROJECT', 'UV_WARP', 'VERTEX_WEIGHT_EDIT',
+    'VERTEX_WEIGHT_MIX', 'VERTEX_WEIGHT_PROXIMITY', 'WARP', 'WAVE', 'WEIGHTED_NORMAL',
+}
+
+_shaders = {}
+
+def get_shader(name):
+    # Compiled once and shared by every overlay and viewport
+    if name not in _shaders:
+        sources = {
+            'overlay': (vertex_shader, fragment_shader),
+            'poles': (pole_vertex_shader, pole_fragment_shader),
+        }
+        _shaders[name] = gpu.types.GPUShader(*sources[name])
+
+    return _shaders[name]
 
 class RETOPOVIEW_OT_overlay(Operator):
     bl_idname = "retopoview.overlay"
@@ -31,105 +54,358 @@ class RETOPOVIEW_OT_overlay(Operator):
     def get_smallest_vector_dimension(self, vector):
         return min(vector)
 
-    def prep_wireframe_batch(self, shader, mesh, obj, vert_idx_cache, edge_indices):
+    def get_face_ranges(self, offsets, faces):
+        # Indices of the per face runs offsets[f]:offsets[f + 1], and the run lengths
+        starts = offsets[faces]
+        counts = offsets[faces + 1] - starts
+
+        return np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum()), counts
+
+    def make_pole_batch(self, data):
+        pole_verts = np.flatnonzero(data["vert_edges"] >= 2)
+
+        if len(pole_verts) == 0:
+            return None
+
+        # Both ends of a glyph share the pole data, side selects the extruded end
+        return batch_for_shader(get_shader('poles'), 'LINES', {
+            "position": np.repeat(data["coords"][pole_verts], 2, axis=0),
+            "normal": np.repeat(data["normals"][pole_verts], 2, axis=0),
+            "side": np.tile(np.array([0, 1], dtype=np.float32), len(pole_verts)),
+        })
+
+    def prep_pole_data(self, mesh, group_id):
+        # A vertex is marked when at least two of its edges touch a face of the group.
+        # The per edge and per vertex counts are kept so edits can update them.
+        face_count = len(mesh.polygons)
+
+        loop_totals = np.empty(face_count, dtype=np.int32)
+        loop_edges = np.empty(len(mesh.loops), dtype=np.int32)
+        edge_verts = np.empty((len(mesh.edges), 2), dtype=np.int32)
+        mesh.polygons.foreach_get("loop_total", loop_totals)
+        mesh.loops.foreach_get("edge_index", loop_edges)
+        mesh.edges.foreach_get("vertices", np.reshape(edge_verts, len(mesh.edges) * 2))
+
         coords = np.empty((len(mesh.vertices), 3), dtype=np.float32)
+        normals = np.empty((len(mesh.vertices), 3), dtype=np.float32)
         mesh.vertices.foreach_get("co", np.reshape(coords, len(mesh.vertices) * 3))
+        mesh.vertices.foreach_get("normal", np.reshape(normals, len(mesh.vertices) * 3))
+
+        loop_offsets = np.zeros(face_count + 1, dtype=np.int64)
+        np.cumsum(loop_totals, out=loop_offsets[1:])
+
+        face_in_group = read_face_group_ids(mesh) == group_id
+        edge_faces = np.bincount(loop_edges[np.repeat(face_in_group, loop_totals)], minlength=len(mesh.edges))
+
+        data = {
+            "face_count": face_count,
+            "group_id": group_id,
+            "face_in_group": face_in_group,
+            "loop_offsets": loop_offsets,
+            "loop_edges": loop_edges,
+            "edge_verts": edge_verts,
+            "coords": coords,
+            "normals": normals,
+            "edge_faces": edge_faces,
+            "vert_edges": np.bincount(edge_verts[edge_faces > 0].ravel(), minlength=len(mesh.vertices)),
+        }
+        data["batch"] = self.make_pole_batch(data)
+
+        return data
+
+    def patch_pole_data(self, data, edits):
+        # Only faces entering or leaving the group move the counts
+        changed = False
+
+        for faces, group_id in edits:
+            faces = faces[(faces >= 0) & (faces < data["face_count"])]
+            in_group = group_id == data["group_id"]
+            flipped = faces[data["face_in_group"][faces] != in_group]
+
+            if len(flipped) == 0:
+                continue
 
-        # Using numpy operations for better performance
-        coords += np.array([v.normal * 0.0035 for v in mesh.vertices])
+            data["face_in_group"][flipped] = in_group
+            step = 1 if in_group else -1
 
-        wireframe_colors = np.zeros((len(mesh.vertices), 4), dtype=np.float32)
-        for v_idx in vert_idx_cache:
-            wireframe_colors[v_idx] = (0, 0, 0, obj.rv_groups_alpha)
+            loops, _ = self.get_face_ranges(data["loop_offsets"], flipped)
+            edges = data["loop_edges"][loops]
+            unique_edges = np.unique(edges)
 
-        return batch_for_shader(shader, 'LINES', {"position": coords, "color": wireframe_colors}, indices=edge_indices)
+            was_touching = data["edge_faces"][unique_edges] > 0
+            np.add.at(data["edge_faces"], edges, step)
+            toggled = unique_edges[was_touching != (data["edge_faces"][unique_edges] > 0)]
 
-    def prep_pole_batch(self, shader, mesh, obj):
-        if obj.mode == 'EDIT':
-            bm = bmesh.from_edit_mesh(obj.data)
-        else:
-            bm = bmesh.new()
-            bm.from_mesh(obj.data)
-            bm.normal_update()
+            np.add.at(data["vert_edges"], data["edge_verts"][toggled].ravel(), step)
+            changed = True
 
-        bm.verts.ensure_lookup_table()
-        bm.edges.ensure_lookup_table()
-        bm.faces.ensure_lookup_table()
+        if changed:
+            data["batch"] = self.make_pole_batch(data)
 
-        retopoViewGroupLayer = bm.faces.layers.int.get("RetopoViewGroupLayer")
+    def get_group_palette(self, obj, group_ids):
+        # Lookup table group id -> RGBA, ids without a group stay fully transparent
+        size = max([int(group_ids.max()) + 1 if len(group_ids) else 1, *(group.group_id + 1 for group in obj.rv_groups)])
+        palette = np.zeros((size, 4), dtype=np.uint8)
 
-        pole_verts = [
-            vert for vert in bm.verts
-            if sum(1 for edge in vert.link_edges if any(face[retopoViewGroupLayer] == obj.rv_groups[obj.rv_index].group_id for face in edge.link_faces)) >= 2
-        ]
+        for group in obj.rv_groups:
+            if group.group_id >= 0:
+                palette[group.group_id] = (*(round(c * 255) for c in group.color[:3]), 128)
 
-        if not pole_verts:
-            return None
+        return palette
 
-        pole_coords = []
-        pole_indices = []
-        smallest_dimension = self.get_smallest_vector_dimension(obj.dimensions)
-        pole_size = smallest_dimension * 0.5 * obj.rv_poles_size
+    def get_face_colors(self, data, faces):
+        group_ids = data["group_ids"][faces]
+        in_palette = (group_ids >= 0) & (group_ids < len(data["palette"]))
 
-        for vert in pole_verts:
-            pole_coords.extend([vert.co, vert.co + vert.normal * pole_size])
-            pole_indices.append([len(pole_coords) - 2, len(pole_coords) - 1])
+        colors = np.zeros((len(faces), 4), dtype=np.uint8)
+        colors[in_palette] = data["palette"][group_ids[in_palette]]
+        colors[data["hidden"][faces], 3] = 0
 
-        pole_color = (obj.rv_poles_color.r, obj.rv_poles_color.g, obj.rv_poles_color.b, 1)
-        pole_colors = [pole_color] * len(pole_coords)
+        return colors
 
-        return batch_for_shader(shader, 'LINES', {"position": pole_coords, "color": pole_colors}, indices=pole_indices)
+    def make_color_buffer(self, colors):
+        color_format = gpu.types.GPUVertFormat()
+        color_format.attr_add(id="color", comp_type='U8', len=4, fetch_mode='INT_TO_FLOAT_UNIT')
 
-    def draw_overlay(self, context, depsgraph, obj):
-        try:
-            if not obj or not obj.rv_enabled or not obj.rv_groups:
-                return {'FINISHED'}
-        except ReferenceError:
-            return {'FINISHED'}
+        color_buffer = gpu.types.GPUVertBuf(color_format, len(colors))
+        color_buffer.attr_fill("color", colors)
 
-        obj = obj.evaluated_get(depsgraph)
-        mesh = obj.to_mesh()
+        return color_buffer
+
+    def make_face_batch(self, data):
+        # Colors live in their own vertex buffer so group edits never re-upload positions
+        batch = gpu.types.GPUBatch(type='TRIS', buf=data["position_buffer"])
+        batch.vertbuf_add(self.make_color_buffer(data["colors"]))
+
+        return batch
 
+    def make_wireframe_batch(self, data):
+        batch = gpu.types.GPUBatch(type='LINES', buf=data["wire_position_buffer"], elem=data["wire_index_buffer"])
+        batch.vertbuf_add(self.make_color_buffer(data["wire_colors"]))
+
+        return batch
+
+    def prep_group_batches(self, mesh, obj):
         mesh.calc_loop_triangles()
-        shader = gpu.types.GPUShader(vertex_shader, fragment_shader)
 
-        verts = []
-        triangle_indices = []
-        colors = []
-        edge_indices = []
-        vert_idx_cache = set()
+        face_count = len(mesh.polygons)
+        triangle_count = len(mesh.loop_triangles)
 
-        retopoViewGroupLayer = mesh.attributes["RetopoViewGroupLayer"]
+        if triangle_count == 0:
+            return None
 
-        idx = 0
-        group_dict = {group.group_id: group.color for group in obj.rv_groups}
+        triangle_verts = np.empty(triangle_count * 3, dtype=np.int32)
+        triangle_faces = np.empty(triangle_count, dtype=np.int32)
+        mesh.loop_triangles.foreach_get("vertices", triangle_verts)
+        mesh.loop_triangles.foreach_get("polygon_index", triangle_faces)
 
-        for triangle in mesh.loop_triangles:
-            if mesh.polygons[triangle.polygon_index].hide and obj.mode == 'EDIT':
-                continue
+        coords = np.empty((len(mesh.vertices), 3), dtype=np.float32)
+        mesh.vertices.foreach_get("co", np.reshape(coords, len(mesh.vertices) * 3))
+
+        hidden = np.zeros(face_count, dtype=bool)
+        if obj.mode == 'EDIT':
+            mesh.polygons.foreach_get("hide", hidden)
 
-            group_color = (1, 1, 1, 0)
-            triangle_parent_poly_group_id = retopoViewGroupLayer.data[triangle.polygon_index].value
+        group_ids = read_face_group_ids(mesh)
 
-            if triangle_parent_poly_group_id in group_dict:
-                group_color = (*group_dict[triangle_parent_poly_group_id][:3], 0.5)
-                if obj.rv_show_wire:
-                    parent_poly = mesh.polygons[triangle.polygon_index]
-                    edge_indices.extend(parent_poly.edge_keys)
-                    vert_idx_cache.update(triangle.vertices)
+        # Loop triangles are stored face by face, the triangles of face f are
+        # triangle_offsets[f]:triangle_offsets[f + 1]
+        triangle_offsets = np.zeros(face_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(triangle_faces, minlength=face_count), out=triangle_offsets[1:])
 
-            verts.extend([mesh.vertices[v_idx].co for v_idx in triangle.vertices])
-            colors.extend([group_color] * 3)
-            triangle_indices.append([idx, idx + 1, idx + 2])
-            idx += 3
+        data = {
+            "face_count": face_count,
+            "group_ids": group_ids,
+            "hidden": hidden,
+            "palette": self.get_group_palette(obj, group_ids),
+            "triangle_offsets": triangle_offsets,
+        }
 
-        batch = batch_for_shader(shader, 'TRIS', {"position": verts, "color": colors}, indices=triangle_indices)
+        face_colors = self.get_face_colors(data, np.arange(face_count))
+        data["colors"] = np.repeat(face_colors[triangle_faces], 3, axis=0)
+
+        position_format = gpu.types.GPUVertFormat()
+        position_format.attr_add(id="position", comp_type='F32', len=3, fetch_mode='FLOAT')
+
+        data["position_buffer"] = gpu.types.GPUVertBuf(position_format, triangle_count * 3)
+        data["position_buffer"].attr_fill("position", coords[triangle_verts])
+        data["batch"] = self.make_face_batch(data)
+        data["wireframe_batch"] = None
 
         if obj.rv_show_wire:
-            wireframe_batch = self.prep_wireframe_batch(shader, mesh, obj, vert_idx_cache, edge_indices)
+            normals = np.empty((len(mesh.vertices), 3), dtype=np.float32)
+            mesh.vertices.foreach_get("normal", np.reshape(normals, len(mesh.vertices) * 3))
+
+            loop_totals = np.empty(face_count, dtype=np.int32)
+            loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+            mesh.polygons.foreach_get("loop_total", loop_totals)
+            mesh.loops.foreach_get("vertex_index", loop_verts)
+
+            # Every loop draws the line to the next loop of its face, so the lines of
+            # face f are the loops loop_offsets[f]:loop_offsets[f + 1] and outlining a
+            # face only means changing the alpha of its loops
+            loop_offsets = np.zeros(face_count + 1, dtype=np.int64)
+            np.cumsum(loop_totals, out=loop_offsets[1:])
+
+            next_loops = np.arange(1, len(loop_verts) + 1, dtype=np.int32)
+            next_loops[loop_offsets[1:] - 1] = loop_offsets[:-1]
+
+            data["loop_offsets"] = loop_offsets
+            data["wired"] = face_colors[:, 3] > 0
+
+            # Opacity is applied through the alpha uniform so it never invalidates the batch
+            data["wire_colors"] = np.zeros((len(loop_verts), 4), dtype=np.uint8)
+            data["wire_colors"][np.repeat(data["wired"], loop_totals), 3] = 255
+
+            data["wire_position_buffer"] = gpu.types.GPUVertBuf(position_format, len(loop_verts))
+            data["wire_position_buffer"].attr_fill("position", (coords + normals * 0.0035)[loop_verts])
+            data["wire_index_buffer"] = gpu.types.GPUIndexBuf(type='LINES', seq=np.stack((np.arange(len(loop_verts), dtype=np.int32), next_loops), axis=1))
+            data["wireframe_batch"] = self.make_wireframe_batch(data)
+
+        return data
+
+    def patch_group_batches(self, data, edits):
+        # Rewrites only the triangles of the edited faces in the cached color array
+        wire_changed = False
+
+        for faces, group_id in edits:
+            faces = faces[(faces >= 0) & (faces < data["face_count"])]
+            data["group_ids"][faces] = group_id
+
+            triangles, counts = self.get_face_ranges(data["triangle_offsets"], faces)
+            corners = (triangles[:, None] * 3 + np.arange(3)).ravel()
+
+            face_colors = self.get_face_colors(data, faces)
+            data["colors"][corners] = np.repeat(face_colors, counts * 3, axis=0)
+
+            if "wired" not in data:
+                continue
+
+            # The outline does not depend on the group, only on faces entering or leaving one
+            wired = face_colors[:, 3] > 0
+            flipped = wired != data["wired"][faces]
+
+            if flipped.any():
+                data["wired"][faces[flipped]] = wired[flipped]
+
+                loops, loop_counts = self.get_face_ranges(data["loop_offsets"], faces[flipped])
+                data["wire_colors"][loops, 3] = np.repeat(wired[flipped], loop_counts) * 255
+                wire_changed = True
+
+        data["batch"] = self.make_face_batch(data)
 
-        if obj.rv_show_poles:
-            pole_batch = self.prep_pole_batch(shader, mesh, obj)
+        if wire_changed:
+            data["wireframe_batch"] = self.make_wireframe_batch(data)
+
+    def get_face_copies(self, obj, original_count, evaluated_count):
+        # How many times every edited face shows up in the evaluated mesh, or None
+        # when the modifiers change topology. Mirror appends a mirrored copy of
+        # everything before it per axis, so copy i of face f is f + i * original_count.
+        copies = 1
+
+        for modifier in obj.modifiers:
+            if not modifier.show_viewport or (obj.mode == 'EDIT' and not modifier.show_in_editmode):
+                continue
+
+            if modifier.type == 'MIRROR' and not any(modifier.use_bisect_axis):
+                copies *= 2 ** sum(modifier.use_axis)
+            elif modifier.type not in FACE_PRESERVING_MODIFIERS:
+                # Anything else is only trusted as long as it keeps the face count
+                return 1 if evaluated_count == original_count else None
+
+        return copies if evaluated_count == original_count * copies else None
+
+    def get_patch_edits(self, obj, dirty, entry):
+        # The recorded edits mapped onto the faces of the stale (key, data) entry,
+        # or None when the entry has to be rebuilt
+        copies = self.get_face_copies(obj, dirty[2], entry[1]["face_count"])
+
+        if copies is None:
+            return None
+
+        offsets = np.arange(copies, dtype=np.int64) * dirty[2]
+
+        return [((faces[:, None] + offsets).ravel(), group_id) for faces, group_id in dirty[3]]
+
+    def get_patchable_entry(self, obj, name, key, dirty):
+        # The stale (key, data) entry if it was built right before the recorded edits
+        entry = get_cache_entry(obj, name)
+
+        if entry is None or entry[0] != dirty[0] or entry[1][0] != key or entry[1][1] is None:
+            return None
+
+        return entry[1]
+
+    def get_overlay_batches(self, obj):
+        # Batches live in the shared per object cache, so every viewport and region
+        # drawing the same object state reuses them. Only the things baked into the
+        # buffers are part of the key, opacity, pole size and colors are uniforms.
+        group_key = (obj.mode, obj.rv_show_wire, tuple((group.group_id, *group.color) for group in obj.rv_groups))
+        pole_key = (obj.mode, obj.rv_groups[obj.rv_index].group_id) if obj.rv_show_poles else None
+
+        group_entry = get_cached(obj, 'overlay_groups')
+        pole_entry = get_cached(obj, 'overlay_poles')
+
+        group_current = group_entry is not None and group_entry[0] == group_key
+        pole_current = pole_key is None or (pole_entry is not None and pole_entry[0] == pole_key)
+
+        if not group_current or not pole_current:
+            dirty = pop_dirty_faces(obj)
+
+            # The recorded edits must be the only geometry change since the caches were built
+            if dirty is not None and dirty[1] == get_revision(obj):
+                if not group_current:
+                    stale_entry = self.get_patchable_entry(obj, 'overlay_groups', group_key, dirty)
+                    edits = stale_entry and self.get_patch_edits(obj, dirty, stale_entry)
+
+                    if edits is not None:
+                        self.patch_group_batches(stale_entry[1], edits)
+                        group_entry, group_current = stale_entry, True
+                        set_cached(obj, 'overlay_groups', group_entry)
+
+                if not pole_current:
+                    stale_entry = self.get_patchable_entry(obj, 'overlay_poles', pole_key, dirty)
+                    edits = stale_entry and self.get_patch_edits(obj, dirty, stale_entry)
+
+                    if edits is not None:
+                        self.patch_pole_data(stale_entry[1], edits)
+                        pole_entry, pole_current = stale_entry, True
+                        set_cached(obj, 'overlay_poles', pole_entry)
+
+        if not group_current or not pole_current:
+            mesh = obj.to_mesh()
+
+            if not group_current:
+                group_entry = (group_key, self.prep_group_batches(mesh, obj))
+                set_cached(obj, 'overlay_groups', group_entry)
+
+            if not pole_current:
+                pole_entry = (pole_key, self.prep_pole_data(mesh, pole_key[1]))
+                set_cached(obj, 'overlay_poles', pole_entry)
+
+            obj.to_mesh_clear()
+
+        data = group_entry[1]
+        pole_batch = pole_entry[1]["batch"] if pole_key is not None else None
+
+        if data is None:
+            return None, None, pole_batch
+
+        return data["batch"], data["wireframe_batch"], pole_batch
+
+    def draw_overlay(self, context, depsgraph, obj):
+        try:
+            if not obj or not obj.rv_enabled or not obj.rv_groups:
+                return {'FINISHED'}
+        except ReferenceError:
+            return {'FINISHED'}
+
+        obj = obj.evaluated_get(depsgraph)
+        batch, wireframe_batch, pole_batch = self.get_overlay_batches(obj)
+
+        shader = get_shader('overlay')
+        region_data = bpy.context.region_data
+        space = bpy.context.space_data
 
         if obj.rv_backface_culling:
             gpu.state.face_culling_set('BACK')
@@ -137,31 +413,38 @@ class RETOPOVIEW_OT_overlay(Operator):
         gpu.state.depth_test_set('LESS_EQUAL')
         gpu.state.blend_set('ALPHA')
 
-        for area in bpy.context.screen.areas:
-            if area.type == 'VIEW_3D':
-                for space in area.spaces:
-                    if space.type == 'VIEW_3D' and space.shading.type == 'WIREFRAME':
-                        gpu.state.depth_test_set('ALWAYS')
+        # Depth testing only depends on the viewport currently being drawn
+        if space.type == 'VIEW_3D' and space.shading.type == 'WIREFRAME':
+            gpu.state.depth_test_set('ALWAYS')
 
         if obj.show_in_front:
             gpu.state.depth_test_set('ALWAYS')
             gpu.state.face_culling_set('BACK')
 
         shader.bind()
-        shader.uniform_float("viewProjectionMatrix", context.region_data.perspective_matrix)
+        shader.uniform_float("viewProjectionMatrix", region_data.perspective_matrix)
         shader.uniform_float("worldMatrix", obj.matrix_world)
         shader.uniform_float("alpha", obj.rv_groups_alpha)
-        batch.draw(shader)
+        if batch:
+            batch.draw(shader)
 
         gpu.state.depth_test_set('LESS_EQUAL')
-        shader.uniform_float("alpha", 1)
 
-        if obj.rv_show_wire:
+        if obj.rv_show_wire and wireframe_batch:
             wireframe_batch.draw(shader)
 
         if obj.rv_show_poles and pole_batch:
+            pole_shader = get_shader('poles')
+            pole_size = self.get_smallest_vector_dimension(obj.dimensions) * 0.5 * obj.rv_poles_size
+
+            pole_shader.bind()
+            pole_shader.uniform_float("viewProjectionMatrix", region_data.perspective_matrix)
+            pole_shader.uniform_float("worldMatrix", obj.matrix_world)
+            pole_shader.uniform_float("poleLength", pole_size)
+            pole_shader.uniform_float("poleColor", (*obj.rv_poles_color, 1))
+
             gpu.state.line_width_set(2)
-            pole_batch.draw(shader)
+            pole_batch.draw(pole_shader)
 
         gpu.state.line_width_set(1)
         gpu.state.depth_test_set('NONE')
@@ -170,15 +453,21 @@ class RETOPOVIEW_OT_overlay(Operator):
         if obj.rv_backface_culling:
             gpu.state.face_culling_set('NONE')
 
+    def remove_overlay(self):
+        bpy.types.SpaceView3D.draw_handler_remove(self.overlay_handler, 'WINDOW')
+
+        # Releases the GPU buffers once no other overlay draws this object
+        release_object(self.invoked_key, 'overlay_groups', 'overlay_poles')
+
     def modal(self, context, event):
         context.area.tag_redraw()
 
         try:
             if not self.invoked_obj.rv_enabled:
-                bpy.types.SpaceView3D.draw_handler_remove(self.overlay_handler, 'WINDOW')
+                self.remove_overlay()
                 return {'FINISHED'}
         except ReferenceError:
-            bpy.types.SpaceView3D.draw_handler_remove(self.overlay_handler, 'WINDOW')
+            self.remove_overlay()
             return {'FINISHED'}
 
         return {'PASS_THROUGH'}
@@ -188,6 +477,8 @@ class RETOPOVIEW_OT_overlay(Operator):
         args = (context, depsgraph, context.object)
 
         self.invoked_obj = context.object
+        self.invoked_key = object_key(context.object)
+        retain_object(self.invoked_key)
         self.overlay_handler = bpy.types.SpaceView3D.draw_handler_add(self.draw_overlay, args, 'WINDOW', 'POST_VIEW')
 
         context.window_manager.modal_handler_add(self)
@@ -0,0 +1,68 @@
+# RetopoView
+# Copyright (C) 2021  Loki Bear
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Pure numpy helpers, kept free of bpy so they can be used outside Blender.
+
+import numpy as np
+
+def edge_face_pairs(loop_edges, loop_faces):
+    """Pair up the faces sharing each edge from per-loop edge and face indices.
+
+    Returns (edges, faces_a, faces_b). Non-manifold edges produce a chain of
+    pairs linking all of their faces.
+    """
+    loop_edges = np.asarray(loop_edges)
+    loop_faces = np.asarray(loop_faces)
+
+    order = np.argsort(loop_edges, kind='stable')
+    sorted_edges = loop_edges[order]
+    sorted_faces = loop_faces[order]
+
+    shared = sorted_edges[1:] == sorted_edges[:-1]
+
+    return sorted_edges[1:][shared], sorted_faces[:-1][shared], sorted_faces[1:][shared]
+
+def connected_components(count, a, b):
+    """Label the connected components of a graph with count nodes and edges a[i] - b[i].
+
+    Vectorized union-find: every round hooks each root onto the smallest root it
+    shares an edge with, then compresses paths until every node points at a root.
+    Returns labels numbered 0..n-1 in order of their smallest node.
+    """
+    parent = np.arange(count)
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+
+    while len(a) > 0:
+        root_a = parent[a]
+        root_b = parent[b]
+
+        crossing = root_a != root_b
+        if not crossing.any():
+            break
+
+        a, b = a[crossing], b[crossing]
+        root_a, root_b = root_a[crossing], root_b[crossing]
+
+        np.minimum.at(parent, np.maximum(root_a, root_b), np.minimum(root_a, root_b))
+
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+    return np.unique(parent, return_inverse=True)[1].reshape(-1)
@@ -0,0 +1,162 @@
+# RetopoView
+# Copyright (C) 2021  Loki Bear
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import bpy
+import math
+import random
+import numpy as np
+from bpy.props import EnumProperty, FloatProperty, IntProperty
+from bpy.types import Operator
+from mathutils import Color
+
+from .rv_regions import edge_face_pairs, connected_components
+from .rv_utils import read_face_group_ids, write_face_group_ids
+from .rv_cache import tag_revision
+
+GOLDEN_RATIO_CONJUGATE = 0.618033988749895
+
+def read_edge_flags(mesh, name):
+    flags = np.zeros(len(mesh.edges), dtype=bool)
+
+    if name == 'use_seam':
+        mesh.edges.foreach_get('use_seam', flags)
+    elif name in mesh.attributes:
+        mesh.attributes[name].data.foreach_get('value', flags)
+
+    return flags
+
+def find_face_regions(mesh, delimit, angle, group_ids):
+    # Faces that already belong to a group are never merged into a new region
+    face_count = len(mesh.polygons)
+
+    loop_totals = np.empty(face_count, dtype=np.int32)
+    loop_edges = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_total', loop_totals)
+    mesh.loops.foreach_get('edge_index', loop_edges)
+
+    edges, faces_a, faces_b = edge_face_pairs(loop_edges, np.repeat(np.arange(face_count), loop_totals))
+
+    keep = (group_ids[faces_a] == 0) & (group_ids[faces_b] == 0)
+
+    if 'SEAM' in delimit:
+        keep &= ~read_edge_flags(mesh, 'use_seam')[edges]
+
+    if 'SHARP' in delimit:
+        keep &= ~read_edge_flags(mesh, 'sharp_edge')[edges]
+
+    if 'FACE_SET' in delimit and '.sculpt_face_set' in mesh.attributes:
+        face_sets = np.zeros(face_count, dtype=np.int32)
+        mesh.attributes['.sculpt_face_set'].data.foreach_get('value', face_sets)
+        keep &= face_sets[faces_a] == face_sets[faces_b]
+
+    if 'ANGLE' in delimit:
+        normals = np.empty(face_count * 3, dtype=np.float32)
+        mesh.polygons.foreach_get('normal', normals)
+        normals = normals.reshape(-1, 3)
+        keep &= np.einsum('ij,ij->i', normals[faces_a], normals[faces_b]) >= math.cos(angle)
+
+    return connected_components(face_count, faces_a[keep], faces_b[keep])
+
+class RETOPOVIEW_OT_seed_groups(Operator):
+    bl_idname = "retopoview.seed_groups"
+    bl_label = "Seed Groups"
+    bl_description = "Create a group for every connected region of unassigned faces"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    delimit: EnumProperty(
+        name="Delimit",
+        items=(
+            ('SEAM', "Seam", "Split regions at UV seams"),
+            ('SHARP', "Sharp", "Split regions at sharp edges"),
+            ('FACE_SET', "Face Set", "Split regions at sculpt face set borders"),
+            ('ANGLE', "Angle", "Split regions where faces meet above the angle threshold"),
+        ),
+        options={'ENUM_FLAG'},
+        default={'SEAM', 'SHARP'},
+    )
+    angle: FloatProperty(name="Angle", subtype='ANGLE', default=math.radians(30), min=0.0, max=math.pi)
+    min_faces: IntProperty(name="Min Faces", description="Leave regions smaller than this unassigned", default=8, min=1)
+    max_groups: IntProperty(name="Max Groups", description="Only seed groups for this many of the largest regions", default=256, min=1)
+
+    @classmethod
+    def poll(cls, context):
+        return context.object is not None and context.object.type == 'MESH'
+
+    def execute(self, context):
+        obj = context.object
+
+        object_mode = obj.mode
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+        mesh = obj.data
+
+        if len(mesh.polygons) == 0:
+            bpy.ops.object.mode_set(mode=object_mode)
+            return {'FINISHED'}
+
+        group_ids = read_face_group_ids(mesh)
+
+        regions = find_face_regions(mesh, self.delimit, self.angle, group_ids)
+        region_sizes = np.bincount(regions[group_ids == 0], minlength=regions.max() + 1)
+
+        seeded = np.flatnonzero(region_sizes >= self.min_faces)
+        skipped = max(len(seeded) - self.max_groups, 0)
+
+        if skipped:
+            # Keep the largest regions, the rest stay unassigned like regions below min faces
+            largest = np.argsort(-region_sizes[seeded], kind='stable')[:self.max_groups]
+            seeded = np.sort(seeded[largest])
+
+        region_to_group = np.zeros(len(region_sizes), dtype=np.int32)
+        region_to_group[seeded] = obj.rv_group_idx_counter + np.arange(len(seeded))
+
+        hue = random.random()
+        had_groups = len(obj.rv_groups) > 0
+
+        for group_id in region_to_group[seeded]:
+            color = Color()
+            color.hsv = (hue, 1, 1)
+
+            group = obj.rv_groups.add()
+            group.color = color
+            group.group_id = int(group_id)
+            group.name = f"Region_{group_id}"
+            hue = (hue + GOLDEN_RATIO_CONJUGATE) % 1
+
+        obj.rv_group_idx_counter += len(seeded)
+
+        unassigned = group_ids == 0
+        group_ids[unassigned] = region_to_group[regions[unassigned]]
+        write_face_group_ids(mesh, group_ids)
+        tag_revision(obj)
+
+        bpy.ops.object.mode_set(mode=object_mode)
+
+        if skipped:
+            self.report({'WARNING'}, f"Seeded {len(seeded)} groups, reached the limit of {self.max_groups} and left {skipped} regions unassigned")
+        else:
+            self.report({'INFO'}, f"Seeded {len(seeded)} groups")
+
+        if len(seeded) > 0 and not had_groups:
+            obj.rv_index = 0
+            obj.rv_enabled = True
+            bpy.ops.retopoview.overlay('INVOKE_DEFAULT')
+
+        return {'FINISHED'}
+
+classes = (
+    RETOPOVIEW_OT_seed_groups,
+)
@@ -39,4 +39,31 @@ fragment_shader = '''
         if (fragColor.a == 0) discard;
         outColor = fragColor;
     }
-'''
\ No newline at end of file
+'''
+
+# Pole glyphs are stored as a base point and a normal per line end, the line is
+# extruded along the normal in the shader so size and color changes are uniforms only
+pole_vertex_shader = '''
+    uniform mat4 viewProjectionMatrix;
+    uniform mat4 worldMatrix;
+    uniform float poleLength;
+
+    in vec3 position;
+    in vec3 normal;
+    in float side;
+
+    void main()
+    {
+        gl_Position = viewProjectionMatrix * worldMatrix * vec4(position + normal * side * poleLength, 1.0f);
+    }
+'''
+
+pole_fragment_shader = '''
+    uniform vec4 poleColor;
+    out vec4 outColor;
+
+    void main()
+    {
+        outColor = poleColor;
+    }
+'''
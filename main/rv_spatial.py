@@ -0,0 +1,288 @@
+# RetopoView
+# Copyright (C) 2021  Loki Bear
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Pure numpy helpers, kept free of bpy so they can be used outside Blender.
+
+import numpy as np
+
+def estimate_cell_size(points):
+    # Mesh face centroids lie on a surface, so size cells from the bounding box
+    # surface area to end up with roughly one point per occupied cell.
+    extent = np.ptp(points, axis=0).astype(np.float64)
+    surface = 2.0 * (extent[0] * extent[1] + extent[1] * extent[2] + extent[2] * extent[0])
+
+    if surface <= 0:
+        surface = float(np.max(extent)) ** 2
+
+    cell_size = np.sqrt(surface / max(len(points), 1))
+
+    return cell_size if cell_size > 0 else 1.0
+
+# Upper bounds on the number of key ranges and candidate points handled in one
+# vectorized step, keeps peak memory flat no matter how far a search has to reach
+RANGE_BUDGET = 1 << 20
+CANDIDATE_BUDGET = 1 << 21
+
+# Cells searched around a query when checking a coarse candidate, on whichever
+# grid level makes that enough to reach the candidate
+REFINE_RADIUS = 4
+
+def _first_per_group(values, group_starts):
+    # values are laid out in contiguous runs starting at group_starts, returns the
+    # position of the smallest value of every run
+    run_min = np.minimum.reduceat(values, group_starts)
+    run_of = np.repeat(np.arange(len(group_starts)), np.diff(np.append(group_starts, len(values))))
+
+    hits = np.flatnonzero(values == run_min[run_of])
+    first = np.ones(len(hits), dtype=bool)
+    first[1:] = run_of[hits[1:]] != run_of[hits[:-1]]
+
+    return hits[first], run_of[hits[first]]
+
+def _build_grid(points, point_ids, origin, cell_size, representatives=False):
+    # Sorted cell keys of the points. With representatives only the first point of
+    # every occupied cell is kept, which gives a coarse, sparse version of the grid
+    cells = np.floor((points[point_ids] - origin) / cell_size).astype(np.int64)
+    dims = cells.max(axis=0) + 1
+    strides = np.array([dims[1] * dims[2], dims[2], 1], dtype=np.int64)
+    keys = cells @ strides
+
+    if representatives:
+        keys, first = np.unique(keys, return_index=True)
+        ids = point_ids[first]
+    else:
+        order = np.argsort(keys, kind='stable')
+        keys, ids = keys[order], point_ids[order]
+
+    return {"origin": origin, "cell_size": cell_size, "dims": dims, "strides": strides, "keys": keys, "ids": ids}
+
+def _grid_cells(grid, points):
+    cells = np.floor((points - grid["origin"]) / grid["cell_size"]).astype(np.int64)
+    return np.clip(cells, 0, grid["dims"] - 1)
+
+def _shell_ranges(grid, radius):
+    # Cells at exactly Chebyshev distance radius, as (dx, dy, z_low, z_high) key
+    # ranges: full z columns on the outer ring, top and bottom caps inside it
+    reach_x, reach_y, reach_z = np.minimum(radius, grid["dims"] - 1)
+    dx, dy = np.meshgrid(np.arange(-reach_x, reach_x + 1), np.arange(-reach_y, reach_y + 1), indexing='ij')
+    dx, dy = dx.ravel(), dy.ravel()
+
+    ring = np.maximum(np.abs(dx), np.abs(dy)) == radius
+    ranges = [(dx[ring], dy[ring], np.full(ring.sum(), -reach_z), np.full(ring.sum(), reach_z))]
+
+    if radius > 0 and reach_z == radius:
+        inner = np.count_nonzero(~ring)
+        ranges.append((dx[~ring], dy[~ring], np.full(inner, -radius), np.full(inner, -radius)))
+        ranges.append((dx[~ring], dy[~ring], np.full(inner, radius), np.full(inner, radius)))
+
+    return tuple(np.concatenate(parts) for parts in zip(*ranges))
+
+def _cube_ranges(grid, radius):
+    # Every cell within Chebyshev distance radius, as full z columns
+    reach_x, reach_y, reach_z = np.minimum(radius, grid["dims"] - 1)
+    dx, dy = np.meshgrid(np.arange(-reach_x, reach_x + 1), np.arange(-reach_y, reach_y + 1), indexing='ij')
+
+    return dx.ravel(), dy.ravel(), np.full(dx.size, -reach_z), np.full(dx.size, reach_z)
+
+def _search_ranges(grid, centers, points, source_points, normal_check, ranges):
+    # Closest grid point to every query among the cell ranges around its center cell.
+    # normal_check is None or (source normals, query normals, min dot).
+    best_idx = np.full(len(points), -1, dtype=np.int64)
+    best_d2 = np.full(len(points), np.inf)
+
+    dx, dy, z_low, z_high = ranges
+    dims, strides, keys = grid["dims"], grid["strides"], grid["keys"]
+
+    if len(dx) == 0:
+        return best_idx, best_d2
+
+    rows_per_step = max(1, RANGE_BUDGET // len(dx))
+
+    for row_start in range(0, len(points), rows_per_step):
+        rows = slice(row_start, row_start + rows_per_step)
+        center = centers[rows]
+
+        cell_x = center[:, 0, None] + dx
+        cell_y = center[:, 1, None] + dy
+        low = center[:, 2, None] + z_low
+        high = center[:, 2, None] + z_high
+
+        valid = (cell_x >= 0) & (cell_x < dims[0]) & (cell_y >= 0) & (cell_y < dims[1]) & (high >= 0) & (low < dims[2])
+        base = cell_x * strides[0] + cell_y * strides[1]
+
+        starts = np.searchsorted(keys, base + np.clip(low, 0, dims[2] - 1), side='left')
+        counts = np.searchsorted(keys, base + np.clip(high, 0, dims[2] - 1), side='right') - starts
+        counts[~valid] = 0
+
+        # Split the rows again so the expanded candidate list stays under budget
+        row_ends = np.cumsum(counts.sum(axis=1))
+        first_row = 0
+
+        while first_row < len(row_ends):
+            consumed = row_ends[first_row - 1] if first_row > 0 else 0
+            last_row = max(first_row + 1, int(np.searchsorted(row_ends, consumed + CANDIDATE_BUDGET, side='right')))
+
+            step_starts = starts[first_row:last_row].ravel()
+            step_counts = counts[first_row:last_row].ravel()
+            total = int(step_counts.sum())
+
+            if total > 0:
+                range_of_candidate = np.repeat(np.arange(len(step_starts)), step_counts)
+                first_of_range = np.cumsum(step_counts) - step_counts
+                positions = step_starts[range_of_candidate] + np.arange(total) - first_of_range[range_of_candidate]
+
+                candidates = grid["ids"][positions]
+                owners = row_start + first_row + range_of_candidate // len(dx)
+
+                delta = source_points[candidates] - points[owners]
+                d2 = np.einsum('ij,ij->i', delta, delta)
+
+                if normal_check is not None:
+                    source_normals, query_normals, min_normal_dot = normal_check
+                    d2[np.einsum('ij,ij->i', source_normals[candidates], query_normals[owners]) < min_normal_dot] = np.inf
+
+                # Candidates come out grouped by owner, in ascending owner order
+                owner_starts = np.flatnonzero(np.diff(owners, prepend=-1))
+                closest, runs = _first_per_group(d2, owner_starts)
+                owners = owners[owner_starts[runs]]
+
+                found = np.isfinite(d2[closest])
+                best_d2[owners[found]] = d2[closest][found]
+                best_idx[owners[found]] = candidates[closest][found]
+
+            first_row = last_row
+
+    return best_idx, best_d2
+
+def nearest_neighbors(source_points, query_points, source_normals=None, query_normals=None,
+                      min_normal_dot=None, cell_size=None, max_radius=2, max_refine_radius=8):
+    """Voxel hash nearest neighbour search.
+
+    Returns (indices, distances) with one entry per query point. Queries are first
+    searched shell by shell out to max_radius cells. Queries with nothing that close
+    get a candidate from progressively coarser grids, then one exact search out to
+    the candidate's distance, capped at max_refine_radius cells. Results are exact
+    whenever the nearest point lies within max_refine_radius cells of the query.
+    The index is -1 when no source point passing the normal check was found.
+    """
+    source_points = np.asarray(source_points, dtype=np.float64)
+    query_points = np.asarray(query_points, dtype=np.float64)
+    use_normals = min_normal_dot is not None and source_normals is not None and query_normals is not None
+
+    indices = np.full(len(query_points), -1, dtype=np.int64)
+    distances = np.full(len(query_points), np.inf)
+
+    if len(source_points) == 0 or len(query_points) == 0:
+        return indices, distances
+
+    if cell_size is None:
+        cell_size = estimate_cell_size(source_points)
+
+    origin = source_points.min(axis=0)
+    all_ids = np.arange(len(source_points))
+    grids = [_build_grid(source_points, all_ids, origin, cell_size)]
+
+    # Walking the queries in cell order keeps the searchsorted lookups cache friendly
+    query_cells = _grid_cells(grids[0], query_points)
+    query_order = np.argsort(query_cells @ grids[0]["strides"], kind='stable')
+    query_cells = query_cells[query_order]
+    points = query_points[query_order]
+
+    normal_check = None
+    if use_normals:
+        query_normals = np.asarray(query_normals, dtype=np.float64)[query_order]
+        normal_check = (np.asarray(source_normals, dtype=np.float64), query_normals, min_normal_dot)
+
+    best_idx = np.full(len(points), -1, dtype=np.int64)
+    best_d2 = np.full(len(points), np.inf)
+    active = np.arange(len(points))
+
+    # Exact phase, one new shell of cells per radius
+    for radius in range(max_radius + 1):
+        active_check = None if normal_check is None else (normal_check[0], normal_check[1][active], min_normal_dot)
+        idx, d2 = _search_ranges(grids[0], query_cells[active], points[active], source_points, active_check, _shell_ranges(grids[0], radius))
+
+        improved = d2 < best_d2[active]
+        best_d2[active[improved]] = d2[improved]
+        best_idx[active[improved]] = idx[improved]
+
+        # Anything outside the visited cube is more than radius cells away
+        reach = radius * cell_size
+        active = active[best_d2[active] > reach * reach]
+
+        if len(active) == 0:
+            break
+
+    # Queries that found nothing nearby: find the closest occupied coarse cell,
+    # then walk back down the levels around the located point
+    pending = active[~np.isfinite(best_d2[active])]
+    level = 0
+
+    while len(pending) > 0:
+        level += 1
+        grids.append(_build_grid(source_points, all_ids, origin, cell_size * 2 ** level, representatives=True))
+
+        located, _ = _search_ranges(grids[level], _grid_cells(grids[level], points[pending]), points[pending], source_points, None, _cube_ranges(grids[level], 1))
+        found = located >= 0
+
+        if found.any():
+            queries = pending[found]
+            located = located[found]
+
+            for finer in range(level - 1, -1, -1):
+                grid = grids[finer]
+                check = None if normal_check is None or finer > 0 else (normal_check[0], normal_check[1][queries], min_normal_dot)
+                idx, d2 = _search_ranges(grid, _grid_cells(grid, source_points[located]), points[queries], source_points, check, _cube_ranges(grid, 1))
+
+                if finer > 0:
+                    located = np.where(idx >= 0, idx, located)
+                else:
+                    best_idx[queries] = idx
+                    best_d2[queries] = d2
+
+        pending = pending[~found]
+
+        # A single cell covering everything always finds a representative
+        if np.all(grids[level]["dims"] == 1):
+            break
+
+    # Everything still active holds a candidate that may not be the nearest. Nothing
+    # closer lies outside its distance d, so one exact search that far settles it.
+    # Queries without any candidate search out to the cap.
+    if len(active) > 0 and max_refine_radius > max_radius:
+        reach = np.minimum(np.sqrt(best_d2[active]), max_refine_radius * cell_size)
+
+        # A full grid at a coarser level covers the same distance with far fewer cell ranges
+        levels = np.maximum(np.ceil(np.log2(reach / (REFINE_RADIUS * cell_size))), 0).astype(np.int64)
+
+        for level in np.unique(levels):
+            in_level = levels == level
+            queries = active[in_level]
+
+            grid = grids[0] if level == 0 else _build_grid(source_points, all_ids, origin, cell_size * 2 ** int(level))
+            radius = int(np.ceil(reach[in_level].max() / grid["cell_size"]))
+
+            check = None if normal_check is None else (normal_check[0], normal_check[1][queries], min_normal_dot)
+            idx, d2 = _search_ranges(grid, _grid_cells(grid, points[queries]), points[queries], source_points, check, _cube_ranges(grid, radius))
+
+            improved = d2 < best_d2[queries]
+            best_d2[queries[improved]] = d2[improved]
+            best_idx[queries[improved]] = idx[improved]
+
+    indices[query_order] = best_idx
+    distances[query_order] = np.sqrt(best_d2)
+
+    return indices, distances
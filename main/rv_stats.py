@@ -0,0 +1,140 @@
+# RetopoView
+# Copyright (C) 2021  Loki Bear
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import bpy
+import bmesh
+import numpy as np
+
+from .rv_cache import object_key, get_revision, get_cached, is_cache_current, set_cached
+from .rv_utils import read_face_group_ids
+
+# Seconds the geometry has to stay unchanged before the stats are recomputed,
+# so dragging vertices around does not recompute on every step
+STATS_DEBOUNCE = 0.25
+
+# object key -> (object name, revision). Only names are kept, object references
+# would dangle after undo or loading a file
+_pending = {}
+
+def group_statistics(group_ids, face_areas, loop_faces, loop_verts, vert_is_pole):
+    # Returns per group id arrays (face count, area, pole count), index 0 is unassigned
+    length = int(group_ids.max()) + 1 if len(group_ids) else 1
+
+    face_counts = np.bincount(group_ids, minlength=length)
+    areas = np.bincount(group_ids, weights=face_areas, minlength=length)
+
+    # A pole shared by several faces of the same group only counts once
+    loop_groups = group_ids[loop_faces]
+    pole_loops = vert_is_pole[loop_verts] & (loop_groups > 0)
+    pairs = np.unique(loop_groups[pole_loops].astype(np.int64) * len(vert_is_pole) + loop_verts[pole_loops])
+    poles = np.bincount(pairs // max(len(vert_is_pole), 1), minlength=length)
+
+    return face_counts, areas, poles
+
+def compute_group_stats(mesh):
+    face_count = len(mesh.polygons)
+
+    group_ids = read_face_group_ids(mesh)
+    group_ids[group_ids < 0] = 0
+
+    face_areas = np.empty(face_count, dtype=np.float32)
+    loop_totals = np.empty(face_count, dtype=np.int32)
+    loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+    loop_edges = np.empty(len(mesh.loops), dtype=np.int32)
+    edge_verts = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+
+    mesh.polygons.foreach_get('area', face_areas)
+    mesh.polygons.foreach_get('loop_total', loop_totals)
+    mesh.loops.foreach_get('vertex_index', loop_verts)
+    mesh.loops.foreach_get('edge_index', loop_edges)
+    mesh.edges.foreach_get('vertices', edge_verts)
+
+    vert_count = len(mesh.vertices)
+    valence = np.bincount(edge_verts, minlength=vert_count)
+
+    # Boundary vertices are expected to have a lower valence, only count interior poles
+    boundary_edges = np.bincount(loop_edges, minlength=len(mesh.edges)) == 1
+    boundary_verts = np.zeros(vert_count, dtype=bool)
+    boundary_verts[edge_verts.reshape(-1, 2)[boundary_edges].ravel()] = True
+
+    vert_is_pole = (valence != 4) & (valence > 0) & ~boundary_verts
+    loop_faces = np.repeat(np.arange(face_count), loop_totals)
+
+    return group_statistics(group_ids, face_areas, loop_faces, loop_verts, vert_is_pole)
+
+def compute_object_group_stats(obj):
+    if obj.mode != 'EDIT':
+        return compute_group_stats(obj.data)
+
+    # Copy the edit mesh into a scratch mesh. Syncing it back into obj.data would
+    # tag a geometry update, making the stats stale again right away and throwing
+    # away every other cache of the object.
+    mesh = bpy.data.meshes.new(".rv_stats")
+
+    try:
+        bmesh.from_edit_mesh(obj.data).to_mesh(mesh)
+        return compute_group_stats(mesh)
+    finally:
+        bpy.data.meshes.remove(mesh)
+
+def _update_pending_stats():
+    for key, (name, revision) in list(_pending.items()):
+        obj = bpy.data.objects.get(name)
+
+        # Renamed, removed or replaced by an undo step, the next redraw reschedules it
+        if obj is None or object_key(obj) != key:
+            del _pending[key]
+            continue
+
+        try:
+            current_revision = get_revision(obj)
+
+            if current_revision != revision:
+                # Still changing, wait for another quiet period
+                _pending[key] = (name, current_revision)
+                continue
+
+            del _pending[key]
+            set_cached(obj, 'group_stats', compute_object_group_stats(obj), revision)
+        except ReferenceError:
+            _pending.pop(key, None)
+
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'PROPERTIES':
+                area.tag_redraw()
+
+    return STATS_DEBOUNCE if _pending else None
+
+def get_group_stats(obj):
+    # Cheap enough to call from UI drawing code, returns the last computed stats
+    # (possibly stale, or None) and schedules a recompute when they are outdated
+    if not is_cache_current(obj, 'group_stats'):
+        key = object_key(obj)
+
+        if key not in _pending:
+            _pending[key] = (obj.name, get_revision(obj))
+
+            if not bpy.app.timers.is_registered(_update_pending_stats):
+                bpy.app.timers.register(_update_pending_stats, first_interval=STATS_DEBOUNCE)
+
+    return get_cached(obj, 'group_stats', allow_stale=True)
+
+def unregister():
+    if bpy.app.timers.is_registered(_update_pending_stats):
+        bpy.app.timers.unregister(_update_pending_stats)
+
+    _pending.clear()
@@ -0,0 +1,87 @@
+# RetopoView
+# Copyright (C) 2021  Loki Bear
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import bpy
+import math
+import numpy as np
+from bpy.props import BoolProperty, FloatProperty
+from bpy.types import Operator
+
+from .rv_spatial import nearest_neighbors
+from .rv_utils import read_face_group_ids, write_face_group_ids, read_world_face_centers_and_normals, merge_group_definitions
+from .rv_cache import tag_revision
+
+def transfer_groups(source, target, use_normals=False, normal_angle=math.radians(60)):
+    # Both objects are expected to be in object mode
+    source_ids = read_face_group_ids(source.data)
+    source_centers, source_normals = read_world_face_centers_and_normals(source)
+    target_centers, target_normals = read_world_face_centers_and_normals(target)
+
+    indices, _ = nearest_neighbors(
+        source_centers, target_centers,
+        source_normals, target_normals,
+        min_normal_dot=math.cos(normal_angle) if use_normals else None,
+    )
+
+    remap = merge_group_definitions(target, ((group.group_id, group.name, group.color) for group in source.rv_groups))
+
+    # Ids that have no group definition on the source are left unassigned
+    matched_ids = source_ids[np.maximum(indices, 0)]
+    matched_ids[(indices < 0) | (matched_ids < 0) | (matched_ids >= len(remap))] = 0
+
+    write_face_group_ids(target.data, remap[matched_ids])
+    tag_revision(target)
+
+    return int(np.count_nonzero(indices >= 0))
+
+class RETOPOVIEW_OT_transfer_groups(Operator):
+    bl_idname = "retopoview.transfer_groups"
+    bl_label = "Transfer Groups"
+    bl_description = "Transfer groups from the active object to the selected objects by nearest face"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    use_normals: BoolProperty(name="Match Normals", description="Ignore faces facing away from each other", default=True)
+    normal_angle: FloatProperty(name="Max Angle", subtype='ANGLE', default=math.radians(60), min=0.0, max=math.pi)
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.object
+
+        if obj is None or obj.type != 'MESH' or len(obj.rv_groups) <= 0:
+            return False
+
+        return any(o != obj and o.type == 'MESH' for o in context.selected_objects)
+
+    def execute(self, context):
+        source = context.object
+        targets = [o for o in context.selected_objects if o != source and o.type == 'MESH']
+
+        object_mode = source.mode
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+        for target in targets:
+            matched = transfer_groups(source, target, self.use_normals, self.normal_angle)
+
+            if matched < len(target.data.polygons):
+                self.report({'WARNING'}, f"{target.name}: {len(target.data.polygons) - matched} faces had no match")
+
+        bpy.ops.object.mode_set(mode=object_mode)
+
+        return {'FINISHED'}
+
+classes = (
+    RETOPOVIEW_OT_transfer_groups,
+)
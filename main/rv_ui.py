@@ -17,11 +17,26 @@
 import bpy
 from bpy.types import UIList, Panel, Menu
 
+from .rv_stats import get_group_stats
+
 class RETOPOVIEW_UL_group_list(UIList):
     def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
         layout.prop(item, "color", text="", emboss=True, icon='COLOR')
         layout.prop(item, "name", text="", emboss=False)
 
+        stats = get_group_stats(data)
+
+        if stats is not None:
+            face_counts, areas, poles = stats
+            face_count, area, pole_count = 0, 0.0, 0
+
+            if 0 < item.group_id < len(face_counts):
+                face_count, area, pole_count = face_counts[item.group_id], areas[item.group_id], poles[item.group_id]
+
+            stats_row = layout.row()
+            stats_row.alignment = 'RIGHT'
+            stats_row.label(text=f"{face_count}f  {pole_count}p  {area:.3g}")
+
 
 class RETOPOVIEW_PT_rv_tool_menu(Panel):
     bl_label = "Topology Groups"
@@ -65,6 +80,16 @@ class RETOPOVIEW_PT_rv_tool_menu(Panel):
 
         layout.separator(factor=0.1)
 
+        tools_row = layout.row(align=True)
+        tools_row.operator("retopoview.seed_groups", text='Seed Groups', icon='MOD_EXPLODE')
+        tools_row.operator("retopoview.transfer_groups", text='Transfer To Selected', icon='PASTEDOWN')
+
+        io_row = layout.row(align=True)
+        io_row.operator("retopoview.import_groups", text='Import', icon='IMPORT')
+        io_row.operator("retopoview.export_groups", text='Export', icon='EXPORT')
+
+        layout.separator(factor=0.1)
+
         if len(obj.rv_groups) <= 0:
             return
 
@@ -15,6 +15,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import bpy
+import numpy as np
 
 def set_up_marker_data_layer(context):
     obj = context.object
@@ -27,4 +28,83 @@ def set_up_marker_data_layer(context):
     if 'RetopoViewGroupLayer' not in mesh.attributes:
         mesh.attributes.new(name='RetopoViewGroupLayer', type='INT', domain='FACE')
 
-    bpy.ops.object.mode_set(mode=object_mode)
\ No newline at end of file
+    bpy.ops.object.mode_set(mode=object_mode)
+
+def ensure_marker_data_layer(mesh):
+    # Object mode only, callers are responsible for leaving edit mode first
+    if 'RetopoViewGroupLayer' not in mesh.attributes:
+        mesh.attributes.new(name='RetopoViewGroupLayer', type='INT', domain='FACE')
+
+    return mesh.attributes['RetopoViewGroupLayer']
+
+def read_face_group_ids(mesh):
+    group_ids = np.zeros(len(mesh.polygons), dtype=np.int32)
+
+    if 'RetopoViewGroupLayer' in mesh.attributes:
+        mesh.attributes['RetopoViewGroupLayer'].data.foreach_get('value', group_ids)
+
+    return group_ids
+
+def write_face_group_ids(mesh, group_ids):
+    layer = ensure_marker_data_layer(mesh)
+    layer.data.foreach_set('value', np.ascontiguousarray(group_ids, dtype=np.int32))
+    mesh.update()
+
+def read_world_face_centers_and_normals(obj):
+    mesh = obj.data
+    face_count = len(mesh.polygons)
+
+    centers = np.empty(face_count * 3, dtype=np.float32)
+    normals = np.empty(face_count * 3, dtype=np.float32)
+    mesh.polygons.foreach_get('center', centers)
+    mesh.polygons.foreach_get('normal', normals)
+
+    matrix = np.array(obj.matrix_world, dtype=np.float32)
+    normal_matrix = np.array(obj.matrix_world.to_3x3().inverted_safe().transposed(), dtype=np.float32)
+
+    centers = centers.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+    normals = normals.reshape(-1, 3) @ normal_matrix.T
+
+    lengths = np.linalg.norm(normals, axis=1)
+    lengths[lengths == 0] = 1
+    normals /= lengths[:, None]
+
+    return centers, normals
+
+def merge_group_definitions(obj, groups):
+    # groups: iterable of (group_id, name, color). Incoming groups whose id and name
+    # match an existing group are merged into it, any other id collision gets a
+    # fresh id from rv_group_idx_counter. Returns a lookup table old id -> new id.
+    groups = list(groups)
+    existing = {group.group_id: group for group in obj.rv_groups}
+
+    max_id = max([group_id for group_id, _, _ in groups], default=0)
+    remap = np.zeros(max_id + 1, dtype=np.int32)
+
+    obj.rv_group_idx_counter = max([obj.rv_group_idx_counter, max_id + 1, *(group_id + 1 for group_id in existing)])
+
+    for group_id, name, color in groups:
+        if group_id <= 0:
+            continue
+
+        current = existing.get(group_id)
+
+        if current is not None and current.name == name:
+            remap[group_id] = group_id
+            continue
+
+        new_id = group_id
+
+        if current is not None:
+            new_id = obj.rv_group_idx_counter
+            obj.rv_group_idx_counter += 1
+
+        group = obj.rv_groups.add()
+        group.color = color[:3]
+        group.group_id = new_id
+        group.name = name
+
+        existing[new_id] = group
+        remap[group_id] = new_id
+
+    return remap